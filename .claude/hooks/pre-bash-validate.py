@@ -9,60 +9,66 @@ import os
 import re
 import sys
 
-# Commands that are always safe (auto-allow)
-SAFE_PATTERNS = [
-    r'^npm run\b',
-    r'^npm test\b',
-    r'^npx next\b',
-    r'^npx tsc\b',
-    r'^npx prisma generate\b',
-    r'^npx prisma migrate dev\b',
-    r'^npx prisma format\b',
-    r'^npx prisma studio\b',
-    r'^npx prisma db push\b',
-    r'^npx shadcn@latest\b',
-    r'^npx shadcn\b',
-    r'^npx vitest\b',
-    r'^npx playwright\b',
-    r'^npx prettier\b',
-    r'^npx turbo\b',
-    r'^npx create-next-app\b',
-    r'^npx tsx\b',
-    r'^npx next lint\b',
-    r'^npm run seed\b',
-    r'^npm outdated\b',
-    r'^npm ls\b',
-    r'^npx next info\b',
-    r'^npx playwright install\b',
-    r'^node\b',
-    r'^git status\b',
-    r'^git log\b',
-    r'^git diff\b',
-    r'^git branch\b',
-    r'^git show\b',
-    r'^git stash list\b',
-    r'^git stash pop\b',
-    r'^git stash apply\b',
-    r'^git push --force-with-lease\b',
-    r'^git remote -v\b',
-    r'^ls\b',
-    r'^pwd\b',
-    r'^which\b',
-    r'^echo\b',
-    r'^cat\b',
-    r'^head\b',
-    r'^tail\b',
-    r'^wc\b',
-    r'^tree\b',
-]
+# Hook input beyond this size is not parsed, and the command is blocked
+# rather than let through unvalidated
+MAX_HOOK_INPUT_BYTES = 4 * 1024 * 1024
+
+# Commands that are always safe (auto-allow). Each entry is a literal word
+# prefix stored with a trailing space, so `(command + " ").startswith(...)`
+# matches whole words only: "ls" covers "ls" and "ls -la" but not "lsblk".
+SAFE_PREFIXES = tuple(f"{command} " for command in (
+    "npm run",
+    "npm test",
+    "npx next",
+    "npx tsc",
+    "npx prisma generate",
+    "npx prisma migrate dev",
+    "npx prisma format",
+    "npx prisma studio",
+    "npx prisma db push",
+    "npx shadcn@latest",
+    "npx shadcn",
+    "npx vitest",
+    "npx playwright",
+    "npx prettier",
+    "npx turbo",
+    "npx create-next-app",
+    "npx tsx",
+    "npx next lint",
+    "npm run seed",
+    "npm outdated",
+    "npm ls",
+    "npx next info",
+    "npx playwright install",
+    "node",
+    "git status",
+    "git log",
+    "git diff",
+    "git branch",
+    "git show",
+    "git stash list",
+    "git stash pop",
+    "git stash apply",
+    "git push --force-with-lease",
+    "git remote -v",
+    "ls",
+    "pwd",
+    "which",
+    "echo",
+    "cat",
+    "head",
+    "tail",
+    "wc",
+    "tree",
+))
 
 # Commands that should be blocked
 BLOCKED_PATTERNS = [
-    (r'\brm\s+(-[a-zA-Z]*r[a-zA-Z]*f|-[a-zA-Z]*f[a-zA-Z]*r)\b', "Blocked: recursive force deletion"),
+    (r'\brm\s+(?:-[a-zA-Z]*r[a-zA-Z]*f|-[a-zA-Z]*f[a-zA-Z]*r)\b', "Blocked: recursive force deletion"),
     (r'\bsudo\b', "Blocked: sudo commands not allowed"),
     (r'\bnpm publish\b', "Blocked: publishing packages not allowed"),
-    (r'\bcurl\b.*\|\s*(ba)?sh', "Blocked: piping curl to shell"),
-    (r'\bwget\b.*\|\s*(ba)?sh', "Blocked: piping wget to shell"),
+    (r'\bcurl\b.*\|\s*(?:ba)?sh', "Blocked: piping curl to shell"),
+    (r'\bwget\b.*\|\s*(?:ba)?sh', "Blocked: piping wget to shell"),
     (r'\bchmod\s+777\b', "Blocked: setting world-writable permissions"),
     (r'\bgit\s+push\s+.*--force\b', "Blocked: force push — use --force-with-lease instead"),
     (r'\bgit\s+push\s+.*-f\b', "Blocked: force push — use --force-with-lease instead"),
@@ -83,33 +89,55 @@ WARNING_PATTERNS = [
     (r'\brm\s+-rf\s+\.next\b', "Warning: rm -rf .next — deleting build cache. Run `npm run build` to regenerate."),
 ]
 
+# Both rule tables merged into one alternation, one group per rule ("b<index>"
+# for blocked, "w<index>" for warnings). Blocked rules come first, so they win
+# whenever a blocked and a warning rule match at the same position.
+DANGER_RE = re.compile("|".join(
+    [f"(?P<b{i}>{p})" for i, (p, _) in enumerate(BLOCKED_PATTERNS)]
+    + [f"(?P<w{i}>{p})" for i, (p, _) in enumerate(WARNING_PATTERNS)]
+))
+
 
 def main():
+    raw_input = sys.stdin.buffer.read(MAX_HOOK_INPUT_BYTES + 1)
+    if len(raw_input) > MAX_HOOK_INPUT_BYTES:
+        print("BLOCKED: Command is too large to validate (hook input over 4 MB).", file=sys.stderr)
+        sys.exit(2)
+
     try:
-        hook_input = json.loads(sys.stdin.read())
-        data = hook_input.get("tool_input", {})
-    except (json.JSONDecodeError, EOFError):
+        hook_input = json.loads(raw_input)
+    except (ValueError, EOFError):
         sys.exit(0)
 
+    if hook_input.get("tool_name", "Bash") != "Bash":
+        sys.exit(0)
+
+    data = hook_input.get("tool_input", {})
+
     command = data.get("command", "").strip()
     if not command:
         sys.exit(0)
 
-    # Check blocked patterns first
-    for pattern, message in BLOCKED_PATTERNS:
-        if re.search(pattern, command):
-            print(message, file=sys.stderr)
+    # Scan for blocked and warning rules in one pass. Each search resumes one
+    # character past the previous match's start, so a long warning match
+    # (e.g. `git commit ... --amend`) can't hide a blocked rule inside it.
+    warned = set()
+    match = DANGER_RE.search(command)
+    while match:
+        kind, index = match.lastgroup[0], int(match.lastgroup[1:])
+        if kind == "b":
+            print(BLOCKED_PATTERNS[index][1], file=sys.stderr)
             sys.exit(2)
+        warned.add(index)
+        match = DANGER_RE.search(command, match.start() + 1)
 
-    # Check warning patterns (allow but warn)
-    for pattern, message in WARNING_PATTERNS:
-        if re.search(pattern, command):
-            print(message, file=sys.stderr)
+    # Allow but warn, in table order
+    for index in sorted(warned):
+        print(WARNING_PATTERNS[index][1], file=sys.stderr)
 
     # Check if command matches safe patterns
-    for pattern in SAFE_PATTERNS:
-        if re.search(pattern, command):
-            sys.exit(0)
+    if (command + " ").startswith(SAFE_PREFIXES):
+        sys.exit(0)
 
     # For unmatched commands, allow but don't auto-approve
     # (Claude Code's permission system will prompt the user)
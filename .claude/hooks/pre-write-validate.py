@@ -7,28 +7,244 @@ Validates file writes before they happen:
 3. Warns about unnecessary client components
 """
 
+import functools
 import json
 import os
 import re
 import sys
 
-
-def get_tool_input():
-    """Read tool input from stdin (Claude Code passes hook input as JSON via stdin)."""
+# Only these tools carry file content for the content checks; the .env.local
+# guard applies to every tool that reaches the hook
+VALIDATED_TOOLS = ("Write", "Edit")
+
+# Local env files hold real secrets and must be edited by hand
+ENV_LOCAL_FILES = frozenset({
+    ".env.local", ".env.development.local", ".env.test.local", ".env.production.local",
+})
+
+# App Router special files, which must default-export their component
+ALLOWED_DEFAULT_EXPORT_FILES = frozenset({
+    "page.tsx", "page.ts", "page.jsx", "page.js",
+    "layout.tsx", "layout.ts", "layout.jsx", "layout.js",
+    "loading.tsx", "loading.ts", "error.tsx", "error.ts",
+    "not-found.tsx", "not-found.ts", "global-error.tsx", "global-error.ts",
+    "template.tsx", "template.ts", "route.tsx", "route.ts",
+    "default.tsx", "default.ts",
+})
+
+# Build output, dependencies and caches at the project root: generated files,
+# never hand-written source, so writes under them skip the content checks
+SKIP_ROOT_DIRS = frozenset({".next", "node_modules", "dist", "build", ".turbo", "coverage", ".cache"})
+
+# Path fragments that mark a file as test code
+TEST_PATH_MARKERS = (".test.", ".spec.", "__tests__", "e2e/")
+
+# Secret patterns are merged into one alternation (group "s<index>" per entry)
+# so a single match both finds a secret and says which type it is.
+SECRET_PATTERNS = [
+    (r'sk-[a-zA-Z0-9]{20,}', "OpenAI/Stripe secret key"),
+    (r'sk-ant-api03-[a-zA-Z0-9_-]+', "Anthropic API key"),
+    (r'AKIA[0-9A-Z]{16}', "AWS Access Key ID"),
+    (r'ghp_[a-zA-Z0-9]{36}', "GitHub Personal Access Token"),
+    (r'gho_[a-zA-Z0-9]{36}', "GitHub OAuth Token"),
+    (r'xoxb-[0-9a-zA-Z-]+', "Slack Bot Token"),
+    (r'xoxp-[0-9a-zA-Z-]+', "Slack User Token"),
+    (r'-----BEGIN (?:RSA |EC )?PRIVATE KEY-----', "Private Key"),
+    (r'postgres(?:ql)?://[^:]+:[^@]+@', "Database connection string with password"),
+    (r'eyJ[a-zA-Z0-9_-]+\.eyJ[a-zA-Z0-9_-]+', "JWT token"),
+    (r'(?:api_key|apiKey|API_KEY)\s*[:=]\s*["\'][^"\']+["\']', "Hardcoded API key"),
+    (r'AIza[0-9A-Za-z_-]{35}', "Firebase API key"),
+    (r'vercel_[a-zA-Z0-9_]{20,}', "Vercel token"),
+    (r'sb-[a-zA-Z0-9_-]{20,}', "Supabase key"),
+]
+SECRET_PATTERN = "|".join(f"(?P<s{i}>{p})" for i, (p, _) in enumerate(SECRET_PATTERNS))
+
+# Literal prefixes that every secret pattern starts with; content scanning
+# only tries SECRET_PATTERN at positions where one of these occurs.
+SECRET_PREFIXES = (
+    "sk-", "AKIA", "ghp_", "gho_", "xoxb-", "xoxp-", "-----BEGIN", "postgres",
+    "eyJ", "api_key", "apiKey", "API_KEY", "AIza", "vercel_", "sb-",
+)
+
+SERVER_ONLY_PATTERNS = [
+    ("import_server_only", r'from\s+["\']server-only["\']', "server-only module"),
+    ("import_db", r'from\s+["\']@/lib/db["\']', "database client (db)"),
+    ("import_auth", r'from\s+["\']@/lib/auth["\']', "auth module (server-only)"),
+]
+
+# Any one of these means the file genuinely needs to be a Client Component
+CLIENT_FEATURES = (
+    "useState", "useEffect", "useRef", "useReducer", "useCallback", "useMemo",
+    "useContext", "useActionState", "useFormStatus", "useOptimistic",
+    "onClick", "onChange", "onSubmit", "onKeyDown", "onFocus", "onBlur",
+    "window", "document", "localStorage", "sessionStorage", "navigator", "createContext",
+)
+CLIENT_FEATURE_PATTERN = r'\b(?:' + "|".join(CLIENT_FEATURES) + r')\b'
+
+USE_FORM_STATE_PATTERN = r'\buseFormState\b'
+FORWARD_REF_PATTERN = r'\bforwardRef\b'
+PAGES_ROUTER_PATTERN = r'\b(getServerSideProps|getStaticProps)\b'
+COOKIES_HEADERS_CALL_PATTERN = r'\b(?:cookies|headers)\s*\(\s*\)'
+PARAMS_WORD_PATTERN = r'\bparams\b'
+# Flags the params type annotation: `params: Promise<...>` or `params: { ... }`
+PARAMS_ANNOTATION_PATTERN = r'params\s*:\s*(?:(?P<params_promise>Promise\s*<)|(?P<params_object>\{))'
+ASYNC_EXPORT_FUNCTION_PATTERN = r'(?m)^export\s+(default\s+)?async\s+function\b'
+IMG_TAG_PATTERN = r'<img\s'
+IMAGE_TAG_PATTERN = r'<Image\b'
+IMAGE_ALT_PATTERN = r'(?s)<Image\b[^>]*\balt\s*='
+INTERNAL_ANCHOR_PATTERN = r'<a\s[^>]*href\s*=\s*["\']/'
+CONSOLE_LOG_PATTERN = r'\bconsole\.log\('
+USE_EFFECT_FETCH_PATTERN = r'(?s)useEffect\s*\([^)]*\b(fetch\s*\(|await\s)'
+DEFAULT_EXPORT_PATTERN = r'(?m)^export\s+default\b'
+
+# Every content check is driven by one scan. Each literal keyword below is
+# where a match for its checks must start; it maps to the flags it can set,
+# each with an anchored confirming pattern (None when the keyword alone is
+# enough). A confirmation whose pattern has named groups also sets the flag
+# named by the group that matched, e.g. the secret type "s<index>". The
+# scanner walks the content once for every keyword, and confirmations only
+# run where one occurs. It stays on the stdlib re module: google-re2 only wins
+# on keyword-sparse text such as minified bundles and is slower on
+# hand-written components.
+SCAN_TRIGGERS = {
+    **{prefix: (("secret", SECRET_PATTERN),) for prefix in SECRET_PREFIXES},
+    '"use client"': (("use_client", None),),
+    "'use client'": (("use_client", None),),
+    '"use server"': (("use_server", None),),
+    "'use server'": (("use_server", None),),
+    **{feature: (("client_feature", CLIENT_FEATURE_PATTERN),) for feature in CLIENT_FEATURES},
+    "useEffect": (
+        ("client_feature", CLIENT_FEATURE_PATTERN),
+        ("use_effect_fetch", USE_EFFECT_FETCH_PATTERN),
+    ),
+    "export": (
+        ("async_export", ASYNC_EXPORT_FUNCTION_PATTERN),
+        ("default_export", DEFAULT_EXPORT_PATTERN),
+    ),
+    "from": tuple((flag, pattern) for flag, pattern, _ in SERVER_ONLY_PATTERNS),
+    "useFormState": (("use_form_state", USE_FORM_STATE_PATTERN),),
+    "forwardRef": (("forward_ref", FORWARD_REF_PATTERN),),
+    "getServerSideProps": (("pages_router", PAGES_ROUTER_PATTERN),),
+    "getStaticProps": (("pages_router", PAGES_ROUTER_PATTERN),),
+    "redirect": (("redirect", None),),
+    "cookies": (("unawaited_cookies", COOKIES_HEADERS_CALL_PATTERN),),
+    "headers": (("unawaited_headers", COOKIES_HEADERS_CALL_PATTERN),),
+    "params": (
+        ("params_word", PARAMS_WORD_PATTERN),
+        ("params_annotation", PARAMS_ANNOTATION_PATTERN),
+        ("awaited_params", PARAMS_WORD_PATTERN),
+    ),
+    "<img": (("img_tag", IMG_TAG_PATTERN),),
+    "<Image": (("image_tag", IMAGE_TAG_PATTERN), ("image_alt", IMAGE_ALT_PATTERN)),
+    "<a": (("internal_anchor", INTERNAL_ANCHOR_PATTERN),),
+    "console.log(": (("console_log", CONSOLE_LOG_PATTERN),),
+}
+
+# Flags that also require the keyword to be (True) or not to be (False)
+# directly preceded by `await`
+AWAITED_FLAGS = {"unawaited_cookies": False, "unawaited_headers": False, "awaited_params": True}
+
+# Every flag scan_flags() reports: the trigger flags plus the named groups that
+# confirmations set through lastgroup (secret types, params annotations)
+SCAN_FLAGS = frozenset(
+    {flag for confirmations in SCAN_TRIGGERS.values() for flag, _ in confirmations}
+    | {f"s{index}" for index in range(len(SECRET_PATTERNS))}
+    | {"params_promise", "params_object"}
+)
+
+
+def is_word_char(char: str) -> bool:
+    """Check whether char counts as a word character for a regex \\b boundary."""
+    return char.isalnum() or char == "_"
+
+
+def is_awaited(content: str, start: int) -> bool:
+    """Check whether the expression at start is directly preceded by `await `."""
+    pos = start
+    while pos > 0 and content[pos - 1].isspace():
+        pos -= 1
+    return pos != start and pos >= 5 and content.startswith("await", pos - 5)
+
+
+def keyword_trie(keywords) -> str:
+    """Build a regex matching any of the literal keywords, factored as a trie.
+
+    sre tries alternatives one by one at each position, so sharing prefixes
+    ("use" across every hook name, "on" across the handlers) cuts the work per
+    character; a keyword is still preferred over any shorter one it extends.
+    """
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        alternation = "|".join(branches)
+        if "" in node:
+            return f"(?:{alternation})?"
+        return alternation if len(branches) == 1 else f"(?:{alternation})"
+
+    return build(trie)
+
+
+# Patterns are compiled on first use rather than at load, so writes that exit
+# on the path alone (.env.local, generated directories, non-TS/JS files) never
+# compile one, and a small edit only compiles the confirmations it reaches.
+@functools.cache
+def compile_scan_re() -> re.Pattern:
+    """Compile the keyword scanner over every SCAN_TRIGGERS keyword."""
+    return re.compile(keyword_trie(SCAN_TRIGGERS))
+
+
+@functools.cache
+def compile_confirmation(pattern: str):
+    """Compile a confirming pattern and return its bound match method."""
+    return re.compile(pattern).match
+
+
+def get_hook_input():
+    """Read hook input from stdin (Claude Code passes hook input as JSON via stdin)."""
     try:
-        hook_input = json.loads(sys.stdin.read())
-        return hook_input.get("tool_input", {})
-    except (json.JSONDecodeError, EOFError):
+        return json.loads(sys.stdin.buffer.read())
+    except (ValueError, EOFError):
         return {}
 
 
-def check_client_directive_on_layout(file_path: str, content: str) -> list[str]:
+def scan_flags(content: str) -> dict[str, bool]:
+    """Walk content once and return every flag in SCAN_FLAGS, set or not.
+
+    Secrets are flagged by their SECRET_PATTERN group ("s<index>") so each type
+    is reported once.
+    """
+    flags = dict.fromkeys(SCAN_FLAGS, False)
+    for keyword in compile_scan_re().finditer(content):
+        start = keyword.start()
+        for flag, pattern in SCAN_TRIGGERS[keyword.group()]:
+            awaited = AWAITED_FLAGS.get(flag)
+            if awaited is not None and is_awaited(content, start) is not awaited:
+                continue
+            if pattern is None:
+                flags[flag] = True
+                continue
+            confirmed = compile_confirmation(pattern)(content, start)
+            if confirmed:
+                flags[flag] = True
+                if confirmed.lastgroup:
+                    flags[confirmed.lastgroup] = True
+    return flags
+
+
+def check_client_directive_on_layout(file_path: str, basename: str, flags: dict[str, bool]) -> list[str]:
     """Check if 'use client' is being added to a layout file."""
     warnings = []
-    basename = os.path.basename(file_path)
 
     if basename in ("layout.tsx", "layout.ts", "layout.jsx", "layout.js"):
-        if '"use client"' in content or "'use client'" in content:
+        if flags["use_client"]:
             warnings.append(
                 f"BLOCKED: Adding 'use client' to {file_path}. "
                 "Layouts should be Server Components. Extract interactive parts "
@@ -37,28 +253,11 @@ def check_client_directive_on_layout(file_path: str, content: str) -> list[str]:
     return warnings
 
 
-def check_hardcoded_secrets(content: str) -> list[str]:
-    """Scan for hardcoded secrets using regex patterns."""
+def check_hardcoded_secrets(flags: dict[str, bool]) -> list[str]:
+    """Report hardcoded secrets found by scan_flags()."""
     warnings = []
-    patterns = [
-        (r'sk-[a-zA-Z0-9]{20,}', "OpenAI/Stripe secret key"),
-        (r'sk-ant-api03-[a-zA-Z0-9_-]+', "Anthropic API key"),
-        (r'AKIA[0-9A-Z]{16}', "AWS Access Key ID"),
-        (r'ghp_[a-zA-Z0-9]{36}', "GitHub Personal Access Token"),
-        (r'gho_[a-zA-Z0-9]{36}', "GitHub OAuth Token"),
-        (r'xoxb-[0-9a-zA-Z-]+', "Slack Bot Token"),
-        (r'xoxp-[0-9a-zA-Z-]+', "Slack User Token"),
-        (r'-----BEGIN (RSA |EC )?PRIVATE KEY-----', "Private Key"),
-        (r'postgres(?:ql)?://[^:]+:[^@]+@', "Database connection string with password"),
-        (r'eyJ[a-zA-Z0-9_-]+\.eyJ[a-zA-Z0-9_-]+', "JWT token"),
-        (r'(api_key|apiKey|API_KEY)\s*[:=]\s*["\'][^"\']+["\']', "Hardcoded API key"),
-        (r'AIza[0-9A-Za-z_-]{35}', "Firebase API key"),
-        (r'vercel_[a-zA-Z0-9_]{20,}', "Vercel token"),
-        (r'sb-[a-zA-Z0-9_-]{20,}', "Supabase key"),
-    ]
-
-    for pattern, description in patterns:
-        if re.search(pattern, content):
+    for index, (_, description) in enumerate(SECRET_PATTERNS):
+        if flags[f"s{index}"]:
             warnings.append(
                 f"BLOCKED: Hardcoded {description} detected. "
                 "Use environment variables instead."
@@ -67,26 +266,74 @@ def check_hardcoded_secrets(content: str) -> list[str]:
     return warnings
 
 
-def check_deprecated_patterns(file_path: str, content: str) -> list[str]:
+def has_redirect_in_try(content: str) -> bool:
+    """Check whether redirect() is called inside any try { ... } block.
+
+    Each try block is delimited by counting braces with str.find/str.count, so
+    nested blocks are followed (a DOTALL regex here could backtrack across every
+    unmatched brace). The search for the next try resumes after the block just
+    checked, so each character is scanned a bounded number of times.
+    Callers only need to run it when scan_flags() saw "redirect".
+    """
+    length = len(content)
+    start = content.find("try")
+    while start != -1:
+        brace = start + 3
+        if start == 0 or not is_word_char(content[start - 1]):
+            while brace < length and content[brace].isspace():
+                brace += 1
+            if brace < length and content[brace] == "{":
+                # Find the matching close brace: every "{" seen so far must be closed
+                depth, pos = 0, brace
+                end = length
+                while True:
+                    close = content.find("}", pos)
+                    if close == -1:
+                        break
+                    depth += content.count("{", pos, close) - 1
+                    if depth == 0:
+                        end = close
+                        break
+                    pos = close + 1
+
+                call = content.find("redirect", brace, end)
+                while call != -1:
+                    paren = call + len("redirect")
+                    while paren < end and content[paren].isspace():
+                        paren += 1
+                    if not is_word_char(content[call - 1]) and paren < end and content[paren] == "(":
+                        return True
+                    call = content.find("redirect", call + 1, end)
+
+                # Any try nested in this block lies inside [brace, end), which
+                # was just searched; an unclosed block runs to the end of content
+                start = content.find("try", end)
+                continue
+        start = content.find("try", start + 3)
+    return False
+
+
+def check_deprecated_patterns(file_path: str, basename: str, content: str,
+                              flags: dict[str, bool]) -> list[str]:
     """Check for deprecated React/Next.js patterns."""
     warnings = []
 
     # Block useFormState (deprecated, must use useActionState)
-    if re.search(r'\buseFormState\b', content):
+    if flags["use_form_state"]:
         warnings.append(
             f"BLOCKED: useFormState is deprecated in {file_path}. "
             "Use useActionState from 'react' instead."
         )
 
     # Warn if forwardRef is used (React 19 ref-as-prop)
-    if re.search(r'\bforwardRef\b', content):
+    if flags["forward_ref"]:
         warnings.append(
             f"WARNING: forwardRef detected in {file_path}. "
             "React 19 supports ref as a regular prop — remove forwardRef wrapper."
         )
 
     # Block Pages Router patterns
-    if re.search(r'\b(getServerSideProps|getStaticProps)\b', content):
+    if flags["pages_router"]:
         warnings.append(
             f"BLOCKED: Pages Router pattern detected in {file_path}. "
             "Use App Router data fetching (Server Components) instead of "
@@ -94,7 +341,7 @@ def check_deprecated_patterns(file_path: str, content: str) -> list[str]:
         )
 
     # Block redirect() inside try-catch (throws NEXT_REDIRECT, not a real error)
-    if re.search(r'try\s*\{[^}]*\bredirect\s*\(', content, re.DOTALL):
+    if flags["redirect"] and has_redirect_in_try(content):
         warnings.append(
             f"BLOCKED: redirect() used inside try-catch in {file_path}. "
             "redirect() throws NEXT_REDIRECT which gets caught. "
@@ -103,34 +350,29 @@ def check_deprecated_patterns(file_path: str, content: str) -> list[str]:
 
     # Warn on cookies() or headers() called without await in Next.js 15
     # Check if any call is NOT preceded by await (with flexible whitespace)
-    calls = re.finditer(r'\b(cookies|headers)\s*\(\s*\)', content)
-    for call in calls:
-        start = call.start()
-        # Look at the text before this call for 'await'
-        preceding = content[max(0, start - 20):start]
-        if not re.search(r'await\s+$', preceding):
+    for name in ("cookies", "headers"):
+        if flags[f"unawaited_{name}"]:
             warnings.append(
-                f"WARNING: {call.group(1)}() may not be awaited in {file_path}. "
+                f"WARNING: {name}() may not be awaited in {file_path}. "
                 "In Next.js 15, cookies() and headers() return Promises — await them."
             )
             break  # One warning is enough
 
     # Warn if params destructured without await in page/layout files
-    basename = os.path.basename(file_path)
     if basename in ("page.tsx", "page.ts", "layout.tsx", "layout.ts"):
         # Match destructuring params without await: { params }: { params: { ... } }
         # but not: { params }: { params: Promise<...> }
-        if re.search(r'params\s*:\s*\{', content) and not re.search(r'params\s*:\s*Promise\s*<', content):
-            if re.search(r'\bparams\b', content) and not re.search(r'await\s+params\b', content):
-                warnings.append(
-                    f"WARNING: params may not be awaited in {file_path}. "
-                    "In Next.js 15, params is a Promise — type it as Promise<...> and await it."
-                )
+        if (flags["params_object"] and not flags["params_promise"]
+                and flags["params_word"] and not flags["awaited_params"]):
+            warnings.append(
+                f"WARNING: params may not be awaited in {file_path}. "
+                "In Next.js 15, params is a Promise — type it as Promise<...> and await it."
+            )
 
     return warnings
 
 
-def check_async_client_components(file_path: str, content: str) -> list[str]:
+def check_async_client_components(file_path: str, flags: dict[str, bool]) -> list[str]:
     """Block async component functions in 'use client' files.
 
     Async arrow functions inside callbacks/event handlers are valid in client
@@ -138,12 +380,12 @@ def check_async_client_components(file_path: str, content: str) -> list[str]:
     declarations (component definitions) are problematic.
     """
     warnings = []
-    if '"use client"' not in content and "'use client'" not in content:
+    if not flags["use_client"]:
         return warnings
 
     # Match top-level async function declarations (component definitions)
     # but NOT async arrow callbacks like: onClick={async () => ...}
-    if re.search(r'^export\s+(default\s+)?async\s+function\b', content, re.MULTILINE):
+    if flags["async_export"]:
         warnings.append(
             f"BLOCKED: Async component function in 'use client' file {file_path}. "
             "Only Server Components can be async. Remove async or remove 'use client'."
@@ -151,19 +393,14 @@ def check_async_client_components(file_path: str, content: str) -> list[str]:
     return warnings
 
 
-def check_server_only_in_client(file_path: str, content: str) -> list[str]:
+def check_server_only_in_client(file_path: str, flags: dict[str, bool]) -> list[str]:
     """Warn on server-only imports in client components."""
     warnings = []
-    if '"use client"' not in content and "'use client'" not in content:
+    if not flags["use_client"]:
         return warnings
 
-    server_only_patterns = [
-        (r'from\s+["\']server-only["\']', "server-only module"),
-        (r'from\s+["\']@/lib/db["\']', "database client (db)"),
-        (r'from\s+["\']@/lib/auth["\']', "auth module (server-only)"),
-    ]
-    for pattern, description in server_only_patterns:
-        if re.search(pattern, content):
+    for flag, _, description in SERVER_ONLY_PATTERNS:
+        if flags[flag]:
             warnings.append(
                 f"WARNING: Importing {description} in 'use client' file {file_path}. "
                 "This import is server-only and will fail in the browser."
@@ -171,7 +408,7 @@ def check_server_only_in_client(file_path: str, content: str) -> list[str]:
     return warnings
 
 
-def check_missing_use_server(file_path: str, content: str) -> list[str]:
+def check_missing_use_server(file_path: str, flags: dict[str, bool]) -> list[str]:
     """Warn if file in src/actions/ lacks 'use server' directive."""
     warnings = []
     if "/actions/" not in file_path:
@@ -179,7 +416,7 @@ def check_missing_use_server(file_path: str, content: str) -> list[str]:
     if not file_path.endswith((".ts", ".tsx")):
         return warnings
 
-    if '"use server"' not in content and "'use server'" not in content:
+    if not flags["use_server"]:
         warnings.append(
             f"WARNING: File in actions/ directory without 'use server' directive: {file_path}. "
             "Server Action files must have \"use server\" at the top."
@@ -187,7 +424,7 @@ def check_missing_use_server(file_path: str, content: str) -> list[str]:
     return warnings
 
 
-def check_img_and_link_patterns(file_path: str, content: str) -> list[str]:
+def check_img_and_link_patterns(file_path: str, flags: dict[str, bool]) -> list[str]:
     """Check for <img> instead of next/image, missing alt, console.log, and <a> for internal links."""
     warnings = []
 
@@ -196,21 +433,21 @@ def check_img_and_link_patterns(file_path: str, content: str) -> list[str]:
         return warnings
 
     # Warn on <img> tag instead of next/image
-    if re.search(r'<img\s', content):
+    if flags["img_tag"]:
         warnings.append(
             f"WARNING: <img> tag detected in {file_path}. "
             "Use next/image (<Image>) for automatic optimization, lazy loading, and srcset."
         )
 
     # Warn on <Image without alt= prop
-    if re.search(r'<Image\b', content) and not re.search(r'<Image\b[^>]*\balt\s*=', content, re.DOTALL):
+    if flags["image_tag"] and not flags["image_alt"]:
         warnings.append(
             f"WARNING: <Image> without alt prop in {file_path}. "
             "All images must have alt text for accessibility."
         )
 
     # Warn on <a href="/..."> for internal links (should use next/link)
-    if re.search(r'<a\s[^>]*href\s*=\s*["\']/', content):
+    if flags["internal_anchor"]:
         warnings.append(
             f"WARNING: <a href=\"/...\"> detected in {file_path}. "
             "Use next/link (<Link>) for internal navigation to enable client-side transitions."
@@ -219,15 +456,15 @@ def check_img_and_link_patterns(file_path: str, content: str) -> list[str]:
     return warnings
 
 
-def check_console_log(file_path: str, content: str) -> list[str]:
+def check_console_log(file_path: str, flags: dict[str, bool]) -> list[str]:
     """Warn on console.log in non-test production code. Block in Server Actions."""
     warnings = []
 
     # Skip test files
-    if any(p in file_path for p in [".test.", ".spec.", "__tests__", "e2e/"]):
+    if any(marker in file_path for marker in TEST_PATH_MARKERS):
         return warnings
 
-    if re.search(r'\bconsole\.log\(', content):
+    if flags["console_log"]:
         # Elevate to BLOCKED for Server Actions (actions directory)
         if "/actions/" in file_path:
             warnings.append(
@@ -244,10 +481,10 @@ def check_console_log(file_path: str, content: str) -> list[str]:
     return warnings
 
 
-def check_useeffect_data_fetching(file_path: str, content: str) -> list[str]:
+def check_useeffect_data_fetching(file_path: str, flags: dict[str, bool]) -> list[str]:
     """Warn on useEffect containing fetch or await (data fetching anti-pattern)."""
     warnings = []
-    if re.search(r'useEffect\s*\([^)]*\b(fetch\s*\(|await\s)', content, re.DOTALL):
+    if flags["use_effect_fetch"]:
         warnings.append(
             f"WARNING: useEffect appears to fetch data in {file_path}. "
             "Data fetching in useEffect causes client-side waterfalls. "
@@ -256,27 +493,18 @@ def check_useeffect_data_fetching(file_path: str, content: str) -> list[str]:
     return warnings
 
 
-def check_default_export_non_page(file_path: str, content: str) -> list[str]:
+def check_default_export_non_page(file_path: str, basename: str, flags: dict[str, bool]) -> list[str]:
     """Warn if non-page/layout files use default exports."""
     warnings = []
-    basename = os.path.basename(file_path)
     # Allow default exports in page, layout, loading, error, not-found, global-error, template, route files
-    allowed_defaults = (
-        "page.tsx", "page.ts", "page.jsx", "page.js",
-        "layout.tsx", "layout.ts", "layout.jsx", "layout.js",
-        "loading.tsx", "loading.ts", "error.tsx", "error.ts",
-        "not-found.tsx", "not-found.ts", "global-error.tsx", "global-error.ts",
-        "template.tsx", "template.ts", "route.tsx", "route.ts",
-        "default.tsx", "default.ts",
-    )
-    if basename in allowed_defaults:
+    if basename in ALLOWED_DEFAULT_EXPORT_FILES:
         return warnings
 
     # Only check component files (not configs, utils, etc.)
     if "/components/" not in file_path and "/hooks/" not in file_path:
         return warnings
 
-    if re.search(r'^export\s+default\b', content, re.MULTILINE):
+    if flags["default_export"]:
         warnings.append(
             f"WARNING: Default export in non-page file {file_path}. "
             "Components should use named exports for better refactoring and tree-shaking."
@@ -284,42 +512,15 @@ def check_default_export_non_page(file_path: str, content: str) -> list[str]:
     return warnings
 
 
-def check_unnecessary_client(file_path: str, content: str) -> list[str]:
+def check_unnecessary_client(file_path: str, flags: dict[str, bool]) -> list[str]:
     """Warn if a file is marked as client but doesn't need to be."""
     warnings = []
 
-    if '"use client"' not in content and "'use client'" not in content:
+    if not flags["use_client"]:
         return warnings
 
     # Check if the file actually uses client-side features
-    client_indicators = [
-        r'\buseState\b',
-        r'\buseEffect\b',
-        r'\buseRef\b',
-        r'\buseReducer\b',
-        r'\buseCallback\b',
-        r'\buseMemo\b',
-        r'\buseContext\b',
-        r'\buseActionState\b',
-        r'\buseFormStatus\b',
-        r'\buseOptimistic\b',
-        r'\bonClick\b',
-        r'\bonChange\b',
-        r'\bonSubmit\b',
-        r'\bonKeyDown\b',
-        r'\bonFocus\b',
-        r'\bonBlur\b',
-        r'\bwindow\b',
-        r'\bdocument\b',
-        r'\blocalStorage\b',
-        r'\bsessionStorage\b',
-        r'\bnavigator\b',
-        r'\bcreateContext\b',
-    ]
-
-    has_client_feature = any(re.search(p, content) for p in client_indicators)
-
-    if not has_client_feature:
+    if not flags["client_feature"]:
         warnings.append(
             f"WARNING: {file_path} is marked 'use client' but doesn't appear to use "
             "any client-side features (hooks, event handlers, browser APIs). "
@@ -329,69 +530,101 @@ def check_unnecessary_client(file_path: str, content: str) -> list[str]:
     return warnings
 
 
-def check_env_local_files(file_path: str) -> list[str]:
+def is_generated_path(file_path: str) -> bool:
+    """Check whether file_path lies under one of SKIP_ROOT_DIRS.
+
+    Only the first component of the path relative to the project root
+    (CLAUDE_PROJECT_DIR, else the working directory) is compared, so a "build"
+    or "dist" directory above the project or deeper in src/ is still validated.
+    """
+    root = os.environ.get("CLAUDE_PROJECT_DIR") or os.getcwd()
+    try:
+        relative = os.path.relpath(file_path, root)
+    except ValueError:
+        # Different drive from the project root on Windows
+        return False
+    return relative.split(os.sep, 1)[0] in SKIP_ROOT_DIRS
+
+
+def check_env_local_files(basename: str) -> list[str]:
     """Block writes to .env.*.local files."""
     warnings = []
-    BLOCKED_FILES = {'.env.local', '.env.development.local', '.env.test.local', '.env.production.local'}
-    if os.path.basename(file_path) in BLOCKED_FILES:
+    if basename in ENV_LOCAL_FILES:
         warnings.append(
             "BLOCKED: Cannot write to .env.local files — add secrets manually"
         )
     return warnings
 
 
+def iter_findings(file_path: str, basename: str, content: str, old_string: str,
+                  flags: dict[str, bool]):
+    """Run the content checks lazily, yielding each finding as soon as it is found."""
+    yield from check_client_directive_on_layout(file_path, basename, flags)
+    yield from check_hardcoded_secrets(flags)
+    if old_string:
+        yield from check_hardcoded_secrets(scan_flags(old_string))
+    yield from check_deprecated_patterns(file_path, basename, content, flags)
+    yield from check_async_client_components(file_path, flags)
+    yield from check_server_only_in_client(file_path, flags)
+    yield from check_missing_use_server(file_path, flags)
+    yield from check_img_and_link_patterns(file_path, flags)
+    yield from check_console_log(file_path, flags)
+    yield from check_useeffect_data_fetching(file_path, flags)
+    yield from check_default_export_non_page(file_path, basename, flags)
+    yield from check_unnecessary_client(file_path, flags)
+
+
 def main():
-    tool_input = get_tool_input()
+    hook_input = get_hook_input()
+    tool_input = hook_input.get("tool_input", {})
     file_path = tool_input.get("file_path", "")
-    content = tool_input.get("content", "") or tool_input.get("new_string", "")
-    old_string = tool_input.get("old_string", "")
 
     if not file_path:
         sys.exit(0)
 
+    basename = os.path.basename(file_path)
+
     # Block .env.local files before any other checks
-    env_warnings = check_env_local_files(file_path)
+    env_warnings = check_env_local_files(basename)
     if env_warnings:
         for w in env_warnings:
             print(w, file=sys.stderr)
         sys.exit(2)
 
-    if not content and not old_string:
+    # Only Write/Edit carry content for the checks below
+    if hook_input.get("tool_name", "Write") not in VALIDATED_TOOLS:
+        sys.exit(0)
+
+    # Skip generated files on the path alone, before any content work
+    if is_generated_path(file_path):
         sys.exit(0)
 
-    # Only check TypeScript/JavaScript files
+    # Only check TypeScript/JavaScript files — decided from the path alone,
+    # before touching the (possibly large) content
     if not file_path.endswith((".ts", ".tsx", ".js", ".jsx")):
         sys.exit(0)
 
-    all_warnings = []
+    content = tool_input.get("content", "") or tool_input.get("new_string", "")
+    old_string = tool_input.get("old_string", "")
 
-    all_warnings.extend(check_client_directive_on_layout(file_path, content))
-    all_warnings.extend(check_hardcoded_secrets(content))
-    if old_string:
-        all_warnings.extend(check_hardcoded_secrets(old_string))
-    all_warnings.extend(check_deprecated_patterns(file_path, content))
-    all_warnings.extend(check_async_client_components(file_path, content))
-    all_warnings.extend(check_server_only_in_client(file_path, content))
-    all_warnings.extend(check_missing_use_server(file_path, content))
-    all_warnings.extend(check_img_and_link_patterns(file_path, content))
-    all_warnings.extend(check_console_log(file_path, content))
-    all_warnings.extend(check_useeffect_data_fetching(file_path, content))
-    all_warnings.extend(check_default_export_non_page(file_path, content))
-    all_warnings.extend(check_unnecessary_client(file_path, content))
-
-    blocked = [w for w in all_warnings if w.startswith("BLOCKED")]
-    warnings = [w for w in all_warnings if w.startswith("WARNING")]
-
-    if blocked:
-        # Output as system message and exit with error to block the write
-        for b in blocked:
-            print(b, file=sys.stderr)
-        sys.exit(2)
+    if not content and not old_string:
+        sys.exit(0)
 
-    if warnings:
-        # Output warnings but allow the write
-        for w in warnings:
-            print(w, file=sys.stderr)
+    # One pass over the content sets every flag the checks below look at
+    flags = scan_flags(content)
+
+    warnings = []
+    for finding in iter_findings(file_path, basename, content, old_string, flags):
+        if finding.startswith("BLOCKED"):
+            # The write is blocked either way, so report this finding as a
+            # system message and skip the checks that haven't run yet
+            print(finding, file=sys.stderr)
+            sys.exit(2)
+        warnings.append(finding)
+
+    # Output warnings but allow the write
+    for w in warnings:
+        print(w, file=sys.stderr)
 
     sys.exit(0)
 